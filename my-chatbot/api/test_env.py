@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # api/test_env.py
 import os
+import importlib.util
 from dotenv import load_dotenv
 
 def test_environment():
@@ -22,14 +23,14 @@ def test_environment():
     
     # Test Python packages
     print("\nPython Packages Check:")
-    packages = ["pinecone", "sentence_transformers", "groq", "dotenv"]
+    packages = ["pinecone", "sentence_transformers", "groq", "dotenv", "tiktoken"]
     
     for package in packages:
-        try:
-            __import__(package)
+        # find_spec locates the package without importing it (sentence_transformers pulls in torch)
+        if importlib.util.find_spec(package) is not None:
             print(f"✓ {package} is installed")
-        except ImportError as e:
-            print(f"✗ {package} is NOT installed: {str(e)}")
+        else:
+            print(f"✗ {package} is NOT installed")
 
 if __name__ == "__main__":
     test_environment()
\ No newline at end of file
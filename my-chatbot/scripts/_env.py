@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# scripts/_env.py
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+from dotenv import dotenv_values
+
+@lru_cache(maxsize=None)
+def load_env_once(env_path: str) -> Dict[str, Optional[str]]:
+    """Parse a .env file once per process and export its values"""
+    values = dotenv_values(env_path)
+    for key, value in values.items():
+        # Same semantics as load_dotenv: never override variables that are already set
+        if value is not None:
+            os.environ.setdefault(key, value)
+    return values
+
+# Load the project .env (next to package.json) and then the repository-level one
+SCRIPT_DIR = Path(__file__).parent.absolute()
+ENV_PATHS = (SCRIPT_DIR.parent / '.env', SCRIPT_DIR.parent.parent / '.env')
+for _env_path in ENV_PATHS:
+    load_env_once(str(_env_path))
+
+# Read once at import instead of on every bot construction
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+PINECONE_API_KEY = os.environ.get('PINECONE_API_KEY')
+PINECONE_INDEX_NAME = os.environ.get('PINECONE_INDEX_NAME', 'rso-chatbot')
+GROQ_API_KEY = os.environ.get('GROQ_API_KEY')
+CHAT_ID = os.environ.get('CHAT_ID')
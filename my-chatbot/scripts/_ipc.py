@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# scripts/_ipc.py
+import json
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def send_message(payload: dict) -> None:
+    """Write one JSON line to the Node process manager"""
+    data = orjson.dumps(payload) if orjson is not None else json.dumps(payload).encode()
+    sys.stdout.buffer.write(data + b"\n")
+    sys.stdout.buffer.flush()
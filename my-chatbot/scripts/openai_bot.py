@@ -1,20 +1,29 @@
 #!/usr/bin/env python3
 #!/usr/bin/env python3
-import pinecone
+import numpy as np
 from sentence_transformers import SentenceTransformer
+import torch
 import os
 import sys
 import json
 import logging
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-from dotenv import load_dotenv
-from openai import OpenAI
-import tiktoken
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
+from _env import OPENAI_API_KEY, PINECONE_API_KEY, PINECONE_INDEX_NAME
+from rso_embedding import EMBED_MODEL_NAME, get_embed_model
+from rso_pinecone import connect_pinecone, join_metadata
+from rso_query_cache import SimilarQueryCache
+from rso_format import RsoMatch, format_rso_contexts, normalize_metadata
+from openai import AsyncOpenAI
+import httpx
 import time
 import asyncio
 from functools import lru_cache
 import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+import hashlib
+import sqlite3
+from collections import OrderedDict
 
 # Set environment variable to handle tokenizer warning
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
@@ -27,23 +36,328 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Static instructions, sent as the first message and never formatted with per-request
+# data so the leading tokens are identical on every call (prompt-prefix caching)
+_SYSTEM_INSTRUCTIONS = """
+        INSTRUCTION:
+        You are a helpful assistant that helps University of Chicago students find and learn about 
+        Registered Student Organizations (RSOs). Use the provided information about RSOs to answer questions accurately. 
+        If asked about RSOs that aren't in the provided data, let the student know you can only provide information 
+        about RSOs in your database."""
+
+_INSTRUCTIONS_MESSAGE = {"role": "system", "content": _SYSTEM_INSTRUCTIONS}
+
+# Routes requests that share the instruction prefix to the same OpenAI prompt cache;
+# derived from the text so editing the instructions starts a fresh cache
+_PROMPT_CACHE_KEY = "rso-bot-" + hashlib.sha256(_SYSTEM_INSTRUCTIONS.encode()).hexdigest()[:16]
+
+# Upper bound on RSO context tokens; lower-ranked matches and fields are dropped past it
+MAX_CONTEXT_TOKENS = 4000
+
+_DOCUMENTS_HEADER = """
+        DOCUMENTS:
+        """
+
+# Query embeddings persist here across restarts and are shared by every chat process
+EMBEDDING_CACHE_PATH = Path.home() / '.cache' / 'rsobot' / 'embeddings.sqlite3'
+
+class EmbeddingStore:
+    """On-disk query embedding cache, stored as float16 to halve its size
+    
+    Rows carry a last-used timestamp; once the table grows past max_rows the
+    least recently used entries are deleted, so the file stays bounded
+    (about 1.5 KB per MPNet embedding).
+    """
+    
+    # How many writes this process makes between size checks
+    PRUNE_EVERY = 64
+    # Hits only rewrite last_used when it is older than this, so most hits are read-only
+    TOUCH_AFTER = 24 * 60 * 60
+    
+    def __init__(self, path: Path, namespace: str, max_rows: int = 20000):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Keys include the model so a backend switch never serves mismatched vectors
+        self.namespace = namespace
+        self.max_rows = max_rows
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL: a crash can lose the last commits but never corrupts the file
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)")
+            # Files created before eviction existed lack the column
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+            if 'last_used' not in columns:
+                self._conn.execute("ALTER TABLE embeddings ADD COLUMN last_used INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self.prune()
+    
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode('utf-8')).digest()
+    
+    def get_many(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Look up stored embeddings, returning only the texts that were found"""
+        keys = {self._key(text): text for text in texts}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, vector, last_used FROM embeddings WHERE key IN ({placeholders})", list(keys)
+            ).fetchall()
+            now = int(time.time())
+            stale = [key for key, _, last_used in rows if now - last_used >= self.TOUCH_AFTER]
+            if stale:
+                with self._conn:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE key IN ({','.join('?' * len(stale))})",
+                        [now] + stale
+                    )
+        return {keys[key]: np.frombuffer(vector, dtype=np.float16).astype(np.float32) for key, vector, _ in rows}
+    
+    def put_many(self, embeddings: Dict[str, np.ndarray]) -> None:
+        """Store embeddings, replacing any existing entries"""
+        now = int(time.time())
+        rows = [(self._key(text), embedding.astype(np.float16).tobytes(), now) for text, embedding in embeddings.items()]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows)
+        self._writes += len(rows)
+        if self._writes >= self.PRUNE_EVERY:
+            self._writes = 0
+            self.prune()
+    
+    def prune(self) -> None:
+        """Delete the least recently used rows beyond max_rows"""
+        with self._lock, self._conn:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            if count > self.max_rows:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (count - self.max_rows,)
+                )
+
+class EmbeddingBatcher:
+    """Coalesces concurrent query embeddings into batched encode calls"""
+    
+    def __init__(self, embed_model: SentenceTransformer,
+                 store: Optional[EmbeddingStore] = None,
+                 executor: Optional[Executor] = None,
+                 max_batch_size: int = 32,
+                 max_wait: float = 0.005,
+                 cache_bytes: int = 16 * 1024 * 1024):
+        self.embed_model = embed_model
+        self.store = store
+        # None runs encodes on the loop's default executor
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.cache_bytes = cache_bytes
+        # Float16 embeddings by query digest, bounded by payload bytes rather than entry
+        # count; only touched from the event loop, so it needs no lock
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._cache_used = 0
+        # Queries already queued or encoding, so duplicates share one future
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def submit(self, text: str) -> np.ndarray:
+        """Embed a query, sharing the encode call with any other queries in flight"""
+        key = self._cache_key(text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached.astype(np.float32)
+        
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._pending = {}
+            self._worker = loop.create_task(self._run())
+        
+        future = self._pending.get(text)
+        if future is None:
+            future = loop.create_future()
+            self._pending[text] = future
+            await self._queue.put((text, future))
+        # Shield so one cancelled caller doesn't cancel the query for the others
+        return await asyncio.shield(future)
+    
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        """Fixed-size digest, so the cache doesn't keep every query string alive"""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    
+    def encode(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed a batch of queries in a single forward pass"""
+        with torch.inference_mode():
+            embeddings = self.embed_model.encode(texts, batch_size=self.max_batch_size, convert_to_numpy=True)
+        # Copy each row so a cached embedding doesn't pin the whole batch array
+        return [np.array(row, dtype=np.float32) for row in embeddings]
+    
+    def encode_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed a batch of queries, reusing any embeddings already on disk"""
+        found: Dict[str, np.ndarray] = {}
+        if self.store is not None:
+            try:
+                found = self.store.get_many(texts)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding disk cache read failed: {e}")
+        
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        if missing:
+            encoded = dict(zip(missing, self.encode(missing)))
+            found.update(encoded)
+            if self.store is not None:
+                try:
+                    self.store.put_many(encoded)
+                except sqlite3.Error as e:
+                    logger.warning(f"Embedding disk cache write failed: {e}")
+        
+        return [found[text] for text in texts]
+    
+    async def _run(self) -> None:
+        """Drain the queue in small batches for the lifetime of the event loop"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            
+            # Wait briefly for more queries, but never past the batch cap
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = await loop.run_in_executor(self.executor, self.encode_batch, texts)
+            except Exception as e:
+                logger.error(f"Error encoding batch of {len(texts)} queries: {str(e)}", exc_info=True)
+                for text, future in batch:
+                    self._pending.pop(text, None)
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (text, future), embedding in zip(batch, embeddings):
+                self._pending.pop(text, None)
+                half = embedding.astype(np.float16)
+                key = self._cache_key(text)
+                previous = self._cache.pop(key, None)
+                if previous is not None:
+                    self._cache_used -= previous.nbytes
+                self._cache[key] = half
+                self._cache_used += half.nbytes
+                if not future.done():
+                    # Widen the cached copy so a repeat query returns identical bytes
+                    future.set_result(half.astype(np.float32))
+            while self._cache_used > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_used -= evicted.nbytes
+
+class LocalIndex:
+    """Exact in-memory cosine top-k over every vector in the Pinecone index
+    
+    The index holds a few hundred RSOs, so a single matrix-vector product is
+    sub-millisecond and skips the Pinecone round trip entirely.
+    """
+    
+    def __init__(self, ids: List[str], vectors: np.ndarray, metadata: Dict[str, Dict[str, Any]]):
+        self.ids = ids
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.matrix = vectors / np.maximum(norms, 1e-12)
+        self.metadata = metadata
+    
+    @classmethod
+    def from_pinecone(cls, index, fetch_batch_size: int = 100) -> "LocalIndex":
+        """Download all vectors and metadata (needs a serverless index for list())"""
+        ids = [vector_id for page in index.list() for vector_id in page]
+        if not ids:
+            raise ValueError("Pinecone index is empty")
+        
+        vectors, metadata = {}, {}
+        for start in range(0, len(ids), fetch_batch_size):
+            fetched = index.fetch(ids=ids[start:start + fetch_batch_size])
+            for vector_id, vector in fetched.vectors.items():
+                vectors[vector_id] = vector.values
+                metadata[vector_id] = normalize_metadata(vector.metadata or {})
+        
+        ids = list(vectors)
+        return cls(ids, np.array([vectors[i] for i in ids], dtype=np.float32), metadata)
+    
+    def query(self, vector: np.ndarray, top_k: int) -> List[Tuple[str, float]]:
+        """Return (id, cosine score) pairs, best first"""
+        scores = self.matrix @ (vector / max(float(np.linalg.norm(vector)), 1e-12))
+        k = min(top_k, len(self.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top]
+
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_lock = threading.Lock()
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared connection pool so every bot reuses the same keep-alive sockets
+    
+    Kept apart from ModelCache so creating the OpenAI client never loads the
+    embedding model.
+    """
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = httpx.AsyncClient(
+                    limits=httpx.Limits(max_keepalive_connections=64, max_connections=256),
+                    timeout=30.0
+                )
+    return _http_client
+
 class ModelCache:
     """Singleton class to cache models and expensive operations"""
     _instance = None
     _lock = threading.Lock()
     
     def __new__(cls):
+        # Fast path: once published, the instance is read without taking the lock
+        instance = cls._instance
+        if instance is not None:
+            return instance
         with cls._lock:
             if cls._instance is None:
-                cls._instance = super().__new__(cls)
-                cls._instance._initialize()
+                # Publish only after a successful initialization so no caller
+                # can observe a half-built cache
+                instance = super().__new__(cls)
+                instance._initialize()
+                cls._instance = instance
             return cls._instance
     
     def _initialize(self):
         """Initialize models and connections once"""
         logger.info("Initializing model cache...")
-        self.embed_model = SentenceTransformer('all-mpnet-base-v2')
-        self.tokenizer = tiktoken.encoding_for_model("gpt-4")
+        self.embed_model = get_embed_model()
+        
+        try:
+            backend = getattr(self.embed_model, 'backend', 'torch')
+            store = EmbeddingStore(EMBEDDING_CACHE_PATH, namespace=f"{EMBED_MODEL_NAME}:{backend}")
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Embedding disk cache unavailable, using memory only: {e}")
+            store = None
+        # One dedicated inference thread: encodes never queue behind Pinecone calls on the
+        # default executor, and torch's intra-op pool isn't oversubscribed by parallel encodes
+        self.embed_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self.batcher = EmbeddingBatcher(self.embed_model, store=store, executor=self.embed_executor)
+        
+        # Warm up kernels and allocators so the first real query runs at steady-state speed
+        torch.set_num_threads(os.cpu_count() or 1)
+        self.batcher.encode(["warmup"] * 4)
         logger.info("Model cache initialization complete")
 
 class HybridRsoBot:
@@ -53,15 +367,10 @@ class HybridRsoBot:
                  openai_api_key: Optional[str] = None):
         """Initialize the Hybrid RSO bot with cached models"""
         try:
-            # Load environment variables
-            script_dir = Path(__file__).parent.absolute()
-            env_path = script_dir.parent.parent / '.env'
-            load_dotenv(dotenv_path=env_path)
-            
             # Set up API keys
-            self.pinecone_api_key = pinecone_api_key or os.getenv('PINECONE_API_KEY')
-            self.openai_api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
-            self.pinecone_index_name = pinecone_index_name or os.getenv('PINECONE_INDEX_NAME', 'rso-chatbot')
+            self.pinecone_api_key = pinecone_api_key or PINECONE_API_KEY
+            self.openai_api_key = openai_api_key or OPENAI_API_KEY
+            self.pinecone_index_name = pinecone_index_name or PINECONE_INDEX_NAME
 
             if not self.pinecone_api_key:
                 raise ValueError("Pinecone API key not found")
@@ -69,14 +378,26 @@ class HybridRsoBot:
                 raise ValueError("OpenAI API key not found")
 
             # Initialize Pinecone
-            self.pc = pinecone.Pinecone(api_key=self.pinecone_api_key)
+            self.pc = connect_pinecone(self.pinecone_api_key)
             self.index = self.pc.Index(self.pinecone_index_name)
             
-            # Get cached models
-            self.model_cache = ModelCache()
+            # Cached models and the OpenAI client are created on first use, so a chat
+            # that never sends a query doesn't pay for loading the embedding model
+            self._model_cache: Optional[ModelCache] = None
+            self._model_task: Optional[asyncio.Future] = None
+            self._client: Optional[AsyncOpenAI] = None
+            self._query_index = lru_cache(maxsize=1024)(self._query_index_raw)
+            # Rephrased repeats skip Pinecone while the index mirror isn't available
+            self._similar_queries = SimilarQueryCache()
+            # RSO metadata by Pinecone id; it rarely changes, so it is fetched once per process
+            self._meta_cache: Dict[str, Dict[str, Any]] = {}
             
-            # Initialize OpenAI client
-            self.client = OpenAI(api_key=self.openai_api_key)
+            # In-memory mirror of the index, downloaded in the background once the first
+            # query arrives; queries use Pinecone until it's ready. One-shot callers that
+            # will never make a second query can turn it off.
+            self.mirror_index = True
+            self._local_index: Optional[LocalIndex] = None
+            self._local_index_started = False
             
             logger.info("HybridRsoBot initialization complete!")
             
@@ -84,109 +405,160 @@ class HybridRsoBot:
             logger.error(f"Initialization error: {str(e)}", exc_info=True)
             raise
 
-    @lru_cache(maxsize=100)
-    def _get_embedding(self, text: str) -> List[float]:
+    @property
+    def model_cache(self) -> ModelCache:
+        """Shared models, loaded on first access"""
+        if self._model_cache is None:
+            self._model_cache = ModelCache()
+        return self._model_cache
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """OpenAI client on the shared connection pool, created on first access"""
+        if self._client is None:
+            self._client = AsyncOpenAI(api_key=self.openai_api_key, http_client=get_http_client())
+        return self._client
+
+    async def _ensure_model_cache(self) -> ModelCache:
+        """Load the shared models in a worker thread, sharing one load between callers"""
+        if self._model_cache is None:
+            if self._model_task is None:
+                self._model_task = asyncio.ensure_future(asyncio.to_thread(ModelCache))
+            task = self._model_task
+            try:
+                # Shield so a cancelled caller doesn't cancel the load for the others
+                self._model_cache = await asyncio.shield(task)
+            except Exception:
+                # Let the next caller retry the load
+                if self._model_task is task:
+                    self._model_task = None
+                raise
+        return self._model_cache
+
+    async def warm(self) -> None:
+        """Preload models and the index mirror so the first query runs at steady-state speed"""
+        self._start_local_index()
+        try:
+            await self._ensure_model_cache()
+        except Exception as e:
+            logger.error(f"Error warming models: {str(e)}", exc_info=True)
+
+    async def _get_embedding(self, text: str) -> np.ndarray:
         """Cache embeddings for repeated queries"""
-        return self.model_cache.embed_model.encode(text).tolist()
+        model_cache = await self._ensure_model_cache()
+        return await model_cache.batcher.submit(text)
+
+    def _start_local_index(self) -> None:
+        """Start downloading the index mirror, at most once per bot"""
+        if self._local_index_started or not self.mirror_index:
+            return
+        self._local_index_started = True
+        threading.Thread(target=self._load_local_index, name="local-index", daemon=True).start()
+
+    def _load_local_index(self) -> None:
+        """Build the in-memory index, leaving Pinecone in charge if that fails"""
+        try:
+            local_index = LocalIndex.from_pinecone(self.index)
+            self._meta_cache.update(local_index.metadata)
+            self._local_index = local_index
+            logger.info(f"Local index ready with {len(local_index.ids)} RSOs")
+        except Exception as e:
+            logger.warning(f"Local index unavailable, querying Pinecone: {e}")
+
+    def _query_index_raw(self, query_key: bytes, top_k: int) -> List[RsoMatch]:
+        """Find the RSOs closest to an embedding (given as float32 bytes)"""
+        query_embedding = np.frombuffer(query_key, dtype=np.float32)
+        local_index = self._local_index
+        if local_index is not None:
+            return [
+                RsoMatch(vector_id, score, local_index.metadata[vector_id])
+                for vector_id, score in local_index.query(query_embedding, top_k)
+            ]
+        
+        cached = self._similar_queries.get(query_embedding)
+        if cached is not None and cached[0] >= top_k:
+            logger.info("Reusing RSOs cached for a similar query")
+            return cached[1][:top_k]
+        
+        results = self.index.query(
+            vector=query_embedding.tolist(),
+            top_k=top_k,
+            include_metadata=False
+        )
+        
+        # Only ids and scores come back; metadata is joined from the local cache
+        matches = join_metadata(self.index, results.matches, self._meta_cache)
+        self._similar_queries.put(query_embedding, (top_k, matches))
+        return matches
 
-    async def get_relevant_contexts(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+    async def get_relevant_contexts(self, query: str, top_k: int = 10) -> List[RsoMatch]:
         """Asynchronously get relevant RSO contexts"""
         try:
             logger.info(f"Searching for relevant RSOs with query: {query}")
-            query_embedding = await asyncio.to_thread(self._get_embedding, query)
+            self._start_local_index()
+            query_embedding = await self._get_embedding(query)
             
-            results = await asyncio.to_thread(
-                self.index.query,
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True
-            )
+            matches = await asyncio.to_thread(self._query_index, query_embedding.tobytes(), top_k)
             
-            logger.info(f"Found {len(results.matches)} matching RSOs")
-            return results.matches
+            logger.info(f"Found {len(matches)} matching RSOs")
+            return matches
             
         except Exception as e:
             logger.error(f"Error in get_relevant_contexts: {str(e)}", exc_info=True)
             return []
 
-    def format_rso_contexts(self, relevant_rsos: List[Dict[str, Any]]) -> str:
+    def format_rso_contexts(self, relevant_rsos: List[RsoMatch]) -> str:
         """Format RSO information efficiently"""
-        if not relevant_rsos:
-            return "No relevant RSOs found in the database."
-        
-        # Pre-allocate lists for better memory efficiency
-        contexts = []
-        for rso in relevant_rsos:
-            metadata = rso.metadata
-            rso_info = [f"Name: {metadata.get('name', 'N/A')}",
-                       f"Description: {metadata.get('description', 'N/A')}"]
-            
-            # Optional fields
-            if categories := metadata.get('categories'):
-                if isinstance(categories, list):
-                    rso_info.append(f"Categories: {', '.join(categories)}")
-            
-            if contact := metadata.get('contact_email'):
-                if contact.lower() not in ['none', 'n/a', '']:
-                    rso_info.append(f"Contact: {contact}")
-            
-            if website := metadata.get('full_url'):
-                if website.lower() not in ['none', 'n/a', '']:
-                    rso_info.append(f"Website: {website}")
-            
-            if social_media := metadata.get('social_media_links'):
-                if isinstance(social_media, list) and social_media:
-                    rso_info.append(f"Social Media: {', '.join(social_media)}")
-            
-            if additional_info := metadata.get('additional_info'):
-                if isinstance(additional_info, list) and additional_info:
-                    rso_info.append(f"Additional Info: {', '.join(additional_info)}")
-            
-            contexts.append("\n".join(rso_info))
-        
-        return "\n\n---\n\n".join(contexts)
+        return format_rso_contexts(relevant_rsos, max_tokens=MAX_CONTEXT_TOKENS)
 
     def create_system_prompt(self, context: str) -> str:
-        """Create system prompt template"""
-        return f"""
-        INSTRUCTION:
-        You are a helpful assistant that helps University of Chicago students find and learn about 
-        Registered Student Organizations (RSOs). Use the provided information about RSOs to answer questions accurately. 
-        If asked about RSOs that aren't in the provided data, let the student know you can only provide information 
-        about RSOs in your database.
+        """Create the per-request documents prompt that follows the static instructions"""
+        return _DOCUMENTS_HEADER + context
 
-        DOCUMENTS:
-        {context}"""
+    async def stream_response(self, query: str) -> AsyncIterator[str]:
+        """Stream the response text as the model generates it"""
+        logger.info(f"Processing query: {query}")
+        start_time = time.time()
+        
+        # Get relevant contexts using RAG
+        relevant_rsos = await self.get_relevant_contexts(query)
+        context = self.format_rso_contexts(relevant_rsos)
+        
+        # Create system prompt
+        system_prompt = self.create_system_prompt(context)
+        
+        # Generate response using ChatGPT; static prefix first, then retrieved documents, then the question
+        stream = await self.client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                _INSTRUCTIONS_MESSAGE,
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"QUESTION: {query}"}
+            ],
+            temperature=0.7,
+            max_tokens=5000,
+            stream=True,
+            extra_body={"prompt_cache_key": _PROMPT_CACHE_KEY}
+        )
+        
+        first_token = True
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                if first_token:
+                    logger.info(f"First token after {time.time() - start_time:.2f} seconds")
+                    first_token = False
+                yield content
+        
+        total_time = time.time() - start_time
+        logger.info(f"Response generated in {total_time:.2f} seconds")
 
     async def generate_response(self, query: str) -> str:
         """Generate response using async operations where possible"""
         try:
-            logger.info(f"Processing query: {query}")
-            start_time = time.time()
-            
-            # Get relevant contexts using RAG
-            relevant_rsos = await self.get_relevant_contexts(query)
-            context = self.format_rso_contexts(relevant_rsos)
-            
-            # Create system prompt
-            system_prompt = self.create_system_prompt(context)
-            
-            # Generate response using ChatGPT
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"QUESTION: {query}"}
-                ],
-                temperature=0.7,
-                max_tokens=5000
-            )
-            
-            total_time = time.time() - start_time
-            logger.info(f"Response generated in {total_time:.2f} seconds")
-            
-            return response.choices[0].message.content
+            return "".join([chunk async for chunk in self.stream_response(query)])
             
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}", exc_info=True)
@@ -199,14 +571,22 @@ _bot_lock = threading.Lock()
 def get_bot_instance() -> HybridRsoBot:
     """Thread-safe singleton instance of HybridRsoBot"""
     global _bot_instance
+    # Fast path once the bot exists: no lock needed to read a published reference
+    if _bot_instance is not None:
+        return _bot_instance
+    
+    # Build outside the lock so a slow initialization doesn't block every other caller,
+    # then publish it; if another thread won the race, its instance is kept
+    try:
+        logger.info("Creating new HybridRsoBot instance...")
+        bot = HybridRsoBot()
+    except Exception as e:
+        logger.error(f"Error creating HybridRsoBot instance: {str(e)}", exc_info=True)
+        raise
+    
     with _bot_lock:
         if _bot_instance is None:
-            try:
-                logger.info("Creating new HybridRsoBot instance...")
-                _bot_instance = HybridRsoBot()
-            except Exception as e:
-                logger.error(f"Error creating HybridRsoBot instance: {str(e)}", exc_info=True)
-                raise
+            _bot_instance = bot
     return _bot_instance
 
 async def main() -> None:
@@ -219,7 +599,10 @@ async def main() -> None:
         query = sys.argv[1]
         logger.info(f"Processing query: {query}")
         
-        bot = get_bot_instance()
+        # get_bot_instance blocks on a threading lock and slow setup; keep that off the event loop
+        bot = await asyncio.to_thread(get_bot_instance)
+        # A single query would only race the index download, never use it
+        bot.mirror_index = False
         response = await bot.generate_response(query)
         print(json.dumps({"response": response}))
         
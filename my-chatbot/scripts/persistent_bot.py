@@ -1,12 +1,10 @@
 #!/usr/bin/env python3
 import sys
-import json
 import logging
-from pathlib import Path
-import os
 import asyncio
 from typing import Optional
-from dotenv import load_dotenv
+from _ipc import send_message
+from _env import CHAT_ID
 
 # Set up logging
 logging.basicConfig(
@@ -16,17 +14,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Messages processed at once by one chat process; replies still go out in arrival order
+MAX_CONCURRENT_MESSAGES = 4
+MAX_MESSAGE_BYTES = 1024 * 1024
+
 class PersistentBot:
     def __init__(self):
         """Initialize the bot with all necessary components"""
         try:
-            # Load environment variables
-            script_dir = Path(__file__).parent.absolute()
-            env_path = script_dir.parent / '.env'
-            load_dotenv(dotenv_path=env_path)
-            
             # Get chat ID from environment
-            self.chat_id = os.getenv('CHAT_ID')
+            self.chat_id = CHAT_ID
             if not self.chat_id:
                 raise ValueError("Chat ID not provided")
 
@@ -42,10 +39,10 @@ class PersistentBot:
             raise
 
     def initialize_bot(self):
-        """Initialize the actual bot implementation"""
+        """Get the process-wide bot; per-chat state stays on this PersistentBot"""
         # Import here to avoid circular imports
-        from openai_bot import HybridRsoBot
-        return HybridRsoBot()
+        from openai_bot import get_bot_instance
+        return get_bot_instance()
 
     async def process_message(self, message: str) -> str:
         """Process a single message using the bot"""
@@ -56,40 +53,99 @@ class PersistentBot:
             logger.error(f"Error processing message: {str(e)}", exc_info=True)
             raise
 
+async def send_in_order(payload: dict, previous_reply: Optional[asyncio.Task]) -> None:
+    """Send a reply once every earlier reply has gone out"""
+    # Replies leave in arrival order. chatProcessManager.js resolves each pending request
+    # with the first reply it sees rather than matching them up, so ordering only keeps
+    # a reply from jumping ahead of an earlier message's; Node still has to send one
+    # message at a time for every request to get its own answer.
+    if previous_reply is not None:
+        await previous_reply
+    send_message(payload)
+
+async def handle_message(bot: PersistentBot, message: str,
+                         previous_reply: Optional[asyncio.Task],
+                         slots: asyncio.Semaphore) -> None:
+    """Process one message, then send its reply in order"""
+    try:
+        payload = {"response": await bot.process_message(message)}
+    except Exception as e:
+        logger.error(f"Error processing message: {str(e)}", exc_info=True)
+        payload = {"error": str(e)}
+    finally:
+        slots.release()
+    
+    await send_in_order(payload, previous_reply)
+
+async def discard_line(reader: asyncio.StreamReader, pending: int) -> None:
+    """Drop the rest of an oversize line, including any part not yet received"""
+    await reader.readexactly(pending)
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly(e.consumed)
+
 async def main():
     """Main loop to handle incoming messages"""
+    previous_reply = None
     try:
-        # Initialize the bot
-        bot = PersistentBot()
+        # Initialize the bot in a worker thread so the event loop is never blocked by it
+        bot = await asyncio.to_thread(PersistentBot)
         logger.info("Bot ready to process messages")
         
-        print(json.dumps({"status": "ready"}))
-        sys.stdout.flush()
+        send_message({"status": "ready"})
+
+        # Load models and the index mirror while the user is still typing; the first
+        # message awaits this same load instead of starting its own
+        warmup = asyncio.create_task(bot.bot.warm())
 
+        # Read stdin without blocking the event loop so new messages can start
+        # while earlier ones are still waiting on Pinecone or OpenAI
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=MAX_MESSAGE_BYTES)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        
+        slots = asyncio.Semaphore(MAX_CONCURRENT_MESSAGES)
+        
         # Process incoming messages
-        for line in sys.stdin:
+        while True:
             try:
-                # Parse the incoming message
-                message = line.strip()
-                if not message:
-                    continue
-                
-                # Process the message
-                response = await bot.process_message(message)
-                
-                # Send the response
-                print(json.dumps({"response": response}))
-                sys.stdout.flush()
-                
-            except Exception as e:
-                logger.error(f"Error processing message: {str(e)}", exc_info=True)
-                print(json.dumps({"error": str(e)}))
-                sys.stdout.flush()
+                line = await reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError as e:
+                # stdin closed; the last message may lack a trailing newline
+                if not e.partial:
+                    break
+                line = e.partial
+            except asyncio.LimitOverrunError as e:
+                logger.error(f"Message exceeds {MAX_MESSAGE_BYTES} bytes, skipping it")
+                try:
+                    await discard_line(reader, e.consumed)
+                except asyncio.IncompleteReadError:
+                    pass
+                previous_reply = asyncio.create_task(send_in_order(
+                    {"error": f"Message too large (limit is {MAX_MESSAGE_BYTES} bytes)"}, previous_reply))
+                continue
+            
+            message = line.decode('utf-8', errors='replace').strip()
+            if not message:
+                continue
+            
+            # Wait for a free slot so a burst of input can't queue unbounded work
+            await slots.acquire()
+            previous_reply = asyncio.create_task(handle_message(bot, message, previous_reply, slots))
+        
+        # stdin closed: let in-flight messages finish before exiting
+        if previous_reply is not None:
+            await previous_reply
                 
     except Exception as e:
         logger.error(f"Fatal error in main loop: {str(e)}", exc_info=True)
-        print(json.dumps({"error": str(e)}))
-        sys.stdout.flush()
+        # Messages already accepted still get their replies before the fatal error
+        if previous_reply is not None:
+            await asyncio.gather(previous_reply, return_exceptions=True)
+        send_message({"error": str(e)})
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -1,15 +1,12 @@
 #!/usr/bin/env python3
-import pinecone
-from sentence_transformers import SentenceTransformer
-from groq import Groq
-import os
-from dotenv import load_dotenv
+from _ipc import send_message
+from _env import GROQ_API_KEY, PINECONE_API_KEY, PINECONE_INDEX_NAME
+from rso_format import RsoMatch, format_rso_contexts, normalize_metadata
 import sys
-import json
+import re
 import logging
-from pathlib import Path
 import time
-from typing import List, Dict, Optional, Any, Union
+from typing import List, Optional
 
 # Set up logging with more detailed format
 logging.basicConfig(
@@ -19,16 +16,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Get the directory containing this script
-script_dir = Path(__file__).parent.absolute()
-env_path = script_dir.parent / '.env'
-
-# Load environment variables
-load_dotenv(dotenv_path=env_path)
-
 # Global bot instance
 _bot_instance = None
 
+# Upper bound on RSO context tokens sent to Groq; lower-ranked matches and fields go first
+MAX_CONTEXT_TOKENS = 2000
+
+# "club"/"clubs" as whole words in any case, so words like "clubhouse" are left alone
+_CLUB_RE = re.compile(r'\bclub(?=s?\b)', re.IGNORECASE)
+
+# Prompts are built once at import; the user prompt is filled with %-formatting per query
+_SYSTEM_PROMPT = """You are a knowledgeable and helpful assistant for University of Chicago students, 
+            specializing in Registered Student Organizations (RSOs). Your role is to help students learn about and 
+            engage with RSOs by:
+
+            - Providing accurate, detailed information about specific RSOs when asked
+            - Recommending relevant RSOs based on students' interests and preferences
+            - Explaining RSO activities, events, and opportunities
+            - Helping with general RSO-related questions
+            - Clarifying any confusion about RSOs or the membership process
+
+            Focus on addressing the student's specific question while maintaining a helpful and informative tone.
+            If you're not sure about specific details, be honest about what you don't know."""
+
+_USER_PROMPT_TEMPLATE = """Here is a student's question about UChicago RSOs: "%(query)s"
+
+            Based on the query, here are relevant RSOs from our database:
+
+            %(context)s
+
+            Please provide a natural, conversational response that:
+            1. Directly addresses their specific question or need
+            2. Only mentions RSOs that are truly relevant to their query
+            3. Provides specific, actionable information when available
+            4. Acknowledges if the available information might not fully answer their question
+
+            If their question isn't about finding RSOs, focus on answering their question rather than listing RSOs."""
+
 class RSORagBot:
     def __init__(self, pinecone_api_key: Optional[str] = None, 
                  pinecone_index_name: Optional[str] = None, 
@@ -38,44 +62,39 @@ class RSORagBot:
         """
         try:
             # Get API keys from parameters or environment
-            self.pinecone_api_key = pinecone_api_key or os.getenv('PINECONE_API_KEY')
-            self.groq_api_key = groq_api_key or os.getenv('GROQ_API_KEY')
-            self.pinecone_index_name = pinecone_index_name or os.getenv('PINECONE_INDEX_NAME', 'rso-chatbot')
+            self.pinecone_api_key = pinecone_api_key or PINECONE_API_KEY
+            self.groq_api_key = groq_api_key or GROQ_API_KEY
+            self.pinecone_index_name = pinecone_index_name or PINECONE_INDEX_NAME
 
             if not self.pinecone_api_key:
                 raise ValueError("Pinecone API key not found")
             if not self.groq_api_key:
                 raise ValueError("Groq API key not found")
 
+            # Heavy imports (torch, transformers, Pinecone, Groq) are deferred to here so
+            # the CLI can reject a missing query without loading them
+            from groq import Groq
+            from rso_embedding import get_embed_model
+            from rso_pinecone import connect_pinecone
+
             # Initialize Pinecone
-            self.pc = pinecone.Pinecone(api_key=self.pinecone_api_key)
+            self.pc = connect_pinecone(self.pinecone_api_key)
             self.index = self.pc.Index(self.pinecone_index_name)
             
-            # Initialize embedding model
-            self.embed_model = SentenceTransformer('all-mpnet-base-v2')
+            # Shared embedding model, loaded once per process (int8 ONNX when available)
+            self.embed_model = get_embed_model()
             
             # Initialize Groq client
             self.groq_client = Groq(api_key=self.groq_api_key)
             
             # Define system prompt
-            self.system_prompt = """You are a knowledgeable and helpful assistant for University of Chicago students, 
-            specializing in Registered Student Organizations (RSOs). Your role is to help students learn about and 
-            engage with RSOs by:
-
-            - Providing accurate, detailed information about specific RSOs when asked
-            - Recommending relevant RSOs based on students' interests and preferences
-            - Explaining RSO activities, events, and opportunities
-            - Helping with general RSO-related questions
-            - Clarifying any confusion about RSOs or the membership process
-
-            Focus on addressing the student's specific question while maintaining a helpful and informative tone.
-            If you're not sure about specific details, be honest about what you don't know."""
+            self.system_prompt = _SYSTEM_PROMPT
 
         except Exception as e:
             logger.error(f"Initialization error: {str(e)}", exc_info=True)
             raise
 
-    def get_relevant_rsos(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+    def get_relevant_rsos(self, query: str, top_k: int = 3) -> List[RsoMatch]:
         """
         Get relevant RSOs based on the query
         
@@ -84,26 +103,32 @@ class RSORagBot:
             top_k: Number of results to return
             
         Returns:
-            List of matching RSOs with their metadata
+            List of matching RSOs with normalized metadata
         """
         try:
             logger.info(f"Searching for RSOs with query: {query}")
-            query_embedding = self.embed_model.encode(query).tolist()
+            query_embedding = self.embed_model.encode(query)
             
             results = self.index.query(
-                vector=query_embedding,
+                vector=query_embedding.tolist(),
                 top_k=top_k,
                 include_metadata=True
             )
             
             logger.info(f"Found {len(results.matches)} matching RSOs")
-            return results.matches
+            # One round trip: this CLI answers a single query, so a local metadata
+            # cache would always be cold and cost an extra fetch
+            matches = [
+                RsoMatch(match.id, match.score, normalize_metadata(match.metadata or {}))
+                for match in results.matches
+            ]
+            return matches
             
         except Exception as e:
             logger.error(f"Error in get_relevant_rsos: {str(e)}", exc_info=True)
             return []
 
-    def format_context(self, relevant_rsos: List[Dict[str, Any]]) -> str:
+    def format_context(self, relevant_rsos: List[RsoMatch]) -> str:
         """
         Format RSO information into a context string for the LLM
         
@@ -114,46 +139,7 @@ class RSORagBot:
             Formatted context string
         """
         try:
-            if not relevant_rsos:
-                return "No relevant RSOs found in the database."
-            
-            context = "Here is the RSO information:\n\n"
-            
-            for rso in relevant_rsos:
-                metadata = rso.metadata
-                try:
-                    # Required fields
-                    context += f"Name: {metadata.get('name', 'N/A')}\n"
-                    context += f"Description: {metadata.get('description', 'N/A')}\n"
-                    
-                    # Optional fields with validation
-                    categories = metadata.get('categories', [])
-                    if categories and isinstance(categories, list):
-                        context += f"Categories: {', '.join(categories)}\n"
-                    
-                    contact = metadata.get('contact_email')
-                    if contact and contact.lower() not in ['none', 'n/a', '']:
-                        context += f"Contact: {contact}\n"
-                    
-                    social_media = metadata.get('social_media_links', [])
-                    if social_media and isinstance(social_media, list):
-                        context += f"Social Media: {', '.join(social_media)}\n"
-                    
-                    additional_info = metadata.get('additional_info', [])
-                    if additional_info and isinstance(additional_info, list):
-                        context += f"Additional Info: {', '.join(additional_info)}\n"
-                    
-                    website = metadata.get('full_url')
-                    if website and website.lower() not in ['none', 'n/a', '']:
-                        context += f"Website: {website}\n"
-                    
-                    context += "\n"
-                    
-                except Exception as e:
-                    logger.error(f"Error formatting RSO metadata: {str(e)}", exc_info=True)
-                    continue
-            
-            return context
+            return format_rso_contexts(relevant_rsos, max_tokens=MAX_CONTEXT_TOKENS)
             
         except Exception as e:
             logger.error(f"Error in format_context: {str(e)}", exc_info=True)
@@ -171,7 +157,7 @@ class RSORagBot:
         """
         try:
             # Normalize query
-            normalized_query = query.lower().replace('club', 'rso')
+            normalized_query = _CLUB_RE.sub('rso', query).lower()
             logger.info(f"Original query: {query}")
             logger.info(f"Normalized query: {normalized_query}")
 
@@ -182,19 +168,7 @@ class RSORagBot:
             context = self.format_context(relevant_rsos)
             
             # Construct prompt
-            prompt = f"""Here is a student's question about UChicago RSOs: "{query}"
-
-            Based on the query, here are relevant RSOs from our database:
-
-            {context}
-
-            Please provide a natural, conversational response that:
-            1. Directly addresses their specific question or need
-            2. Only mentions RSOs that are truly relevant to their query
-            3. Provides specific, actionable information when available
-            4. Acknowledges if the available information might not fully answer their question
-
-            If their question isn't about finding RSOs, focus on answering their question rather than listing RSOs."""
+            prompt = _USER_PROMPT_TEMPLATE % {'query': query, 'context': context}
             
             # Get response from Groq
             response = self.groq_client.chat.completions.create(
@@ -232,7 +206,7 @@ def main() -> None:
         if len(sys.argv) < 2:
             error_msg = {"error": "No query provided"}
             logger.error("No query provided")
-            print(json.dumps(error_msg))
+            send_message(error_msg)
             return
 
         query = sys.argv[1]
@@ -247,11 +221,11 @@ def main() -> None:
         total_time = time.time() - start_time
         
         logger.info(f"Total processing time: {total_time:.2f} seconds")
-        print(json.dumps({"response": response}))
+        send_message({"response": response})
         
     except Exception as e:
         logger.error(f"Error in main: {str(e)}", exc_info=True)
-        print(json.dumps({"error": str(e)}))
+        send_message({"error": str(e)})
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# scripts/rso_embedding.py
+import logging
+import threading
+from typing import Optional
+import torch
+from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+EMBED_MODEL_NAME = 'all-mpnet-base-v2'
+# Int8 (AVX-512 VNNI) export published with the model on the Hugging Face hub
+ONNX_INT8_FILE = 'onnx/model_qint8_avx512_vnni.onnx'
+
+def load_embed_model() -> SentenceTransformer:
+    """Load the query embedding model: fp16 on a GPU, otherwise the int8 ONNX export"""
+    if torch.cuda.is_available():
+        # Half precision halves memory traffic on GPU with negligible embedding drift
+        embed_model = SentenceTransformer(EMBED_MODEL_NAME, device='cuda').half()
+        logger.info("Loaded fp16 embedding model on CUDA")
+        return embed_model
+    
+    try:
+        embed_model = SentenceTransformer(
+            EMBED_MODEL_NAME,
+            backend='onnx',
+            model_kwargs={'file_name': ONNX_INT8_FILE, 'provider': 'CPUExecutionProvider'}
+        )
+        logger.info(f"Loaded int8 ONNX embedding model ({ONNX_INT8_FILE})")
+        return embed_model
+    except Exception as e:
+        # Older sentence-transformers or missing onnxruntime: keep the fp32 PyTorch model
+        logger.warning(f"ONNX embedding model unavailable, falling back to PyTorch: {e}")
+        return SentenceTransformer(EMBED_MODEL_NAME)
+
+_embed_model: Optional[SentenceTransformer] = None
+_embed_model_lock = threading.Lock()
+
+def get_embed_model() -> SentenceTransformer:
+    """Return the process-wide embedding model, loading it on first use"""
+    global _embed_model
+    if _embed_model is None:
+        with _embed_model_lock:
+            if _embed_model is None:
+                _embed_model = load_embed_model()
+    return _embed_model
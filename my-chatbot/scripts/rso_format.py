@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# scripts/rso_format.py
+import logging
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, NamedTuple
+
+# Placeholder values that mean a metadata field is effectively empty
+_EMPTY_SENTINELS = frozenset(('none', 'n/a', ''))
+_SEPARATOR = "\n\n---\n\n"
+# gpt-4o-mini's encoding, named directly so older tiktoken releases that can't map
+# the model name still load it
+_ENCODING_NAME = "o200k_base"
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """Load the tokenizer on first use, or None when tiktoken can't provide it"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(_ENCODING_NAME)
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, RSO context will not be token-budgeted: {e}")
+        return None
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """Count tokens in a context fragment, cached since the same RSOs recur"""
+    return len(_encoding().encode_ordinary(text))
+
+class RsoMatch(NamedTuple):
+    """A Pinecone match joined with normalized RSO metadata"""
+    id: str
+    score: float
+    metadata: Dict[str, Any]
+
+def _clean_str(value: Any) -> Optional[str]:
+    """Return a string field, or None for missing values and placeholders"""
+    if isinstance(value, str) and value.strip().lower() not in _EMPTY_SENTINELS:
+        return value
+    return None
+
+def _clean_list(value: Any) -> Optional[List[str]]:
+    """Return a list field as a non-empty list of strings, or None"""
+    if isinstance(value, str):
+        value = [value] if _clean_str(value) else []
+    if isinstance(value, list) and value:
+        return [str(item) for item in value]
+    return None
+
+def normalize_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Clean raw Pinecone metadata once, when it is first cached
+    
+    Placeholder strings become None and list fields are always lists, so
+    formatting a match is just a presence check per field.
+    """
+    normalized = dict(metadata)
+    normalized['name'] = metadata.get('name', 'N/A')
+    normalized['description'] = metadata.get('description', 'N/A')
+    for key in ('contact_email', 'full_url'):
+        normalized[key] = _clean_str(metadata.get(key))
+    for key in ('categories', 'additional_info', 'social_media_links'):
+        normalized[key] = _clean_list(metadata.get(key))
+    return normalized
+
+def _rso_fields(metadata: Dict[str, Any]) -> List[str]:
+    """Build one RSO's 'Field: value' lines, highest-value fields first"""
+    rso_info = [f"Name: {metadata['name']}",
+                f"Description: {metadata['description']}"]
+    
+    # Optional fields, in the order they should survive truncation
+    if categories := metadata['categories']:
+        rso_info.append(f"Categories: {', '.join(categories)}")
+    if contact := metadata['contact_email']:
+        rso_info.append(f"Contact: {contact}")
+    if website := metadata['full_url']:
+        rso_info.append(f"Website: {website}")
+    if additional_info := metadata['additional_info']:
+        rso_info.append(f"Additional Info: {', '.join(additional_info)}")
+    if social_media := metadata['social_media_links']:
+        rso_info.append(f"Social Media: {', '.join(social_media)}")
+    
+    return rso_info
+
+def format_rso_contexts(relevant_rsos: List[Any], max_tokens: Optional[int] = None) -> str:
+    """Format RsoMatch results (normalized metadata) into the LLM context block
+    
+    With max_tokens set and tiktoken available, matches are added best-first
+    until the budget is spent; the RSO that crosses it keeps only the fields
+    that fit, dropping the low-value tail, and no later matches are formatted.
+    """
+    if not relevant_rsos:
+        return "No relevant RSOs found in the database."
+    
+    if max_tokens is None or _encoding() is None:
+        return _SEPARATOR.join("\n".join(_rso_fields(rso.metadata)) for rso in relevant_rsos)
+    
+    blocks = []
+    remaining = max_tokens
+    for rso in relevant_rsos:
+        if blocks:
+            remaining -= count_tokens(_SEPARATOR)
+        kept = []
+        for line in _rso_fields(rso.metadata):
+            # One extra token for the newline joining fields
+            cost = count_tokens(line) + 1
+            if cost > remaining:
+                break
+            kept.append(line)
+            remaining -= cost
+        else:
+            blocks.append("\n".join(kept))
+            continue
+        # Budget spent mid-RSO: keep whatever fit and stop formatting
+        if kept:
+            blocks.append("\n".join(kept))
+        break
+    
+    return _SEPARATOR.join(blocks) if blocks else "No relevant RSOs found in the database."
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# scripts/rso_pinecone.py
+from typing import Any, Dict, List
+import pinecone
+from rso_format import RsoMatch, normalize_metadata
+
+def connect_pinecone(api_key: str) -> Any:
+    """Create a Pinecone client, over gRPC when the pinecone[grpc] extra is installed
+    
+    gRPC's win is the binary transport and persistent HTTP/2 channel; query
+    vectors are still passed as plain lists, which protobuf copies fastest.
+    """
+    try:
+        from pinecone.grpc import PineconeGRPC
+        return PineconeGRPC(api_key=api_key)
+    except ImportError:
+        return pinecone.Pinecone(api_key=api_key)
+
+def join_metadata(index, matches: List[Any], meta_cache: Dict[str, Dict[str, Any]]) -> List[RsoMatch]:
+    """Attach locally cached metadata to id/score matches from a query run
+    with include_metadata=False, fetching (and caching) only ids not seen yet
+    """
+    missing = [match.id for match in matches if match.id not in meta_cache]
+    if missing:
+        fetched = index.fetch(ids=missing)
+        for vector_id, vector in fetched.vectors.items():
+            meta_cache[vector_id] = normalize_metadata(vector.metadata or {})
+    
+    return [
+        RsoMatch(match.id, match.score, meta_cache[match.id])
+        for match in matches
+        if match.id in meta_cache
+    ]
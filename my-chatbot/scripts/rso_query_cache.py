@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# scripts/rso_query_cache.py
+import threading
+from typing import Any, List, Optional
+import numpy as np
+
+class SimilarQueryCache:
+    """LRU cache of retrieval results keyed by query embedding
+    
+    A lookup hits when a cached query's cosine similarity to the new one is
+    at least `threshold`, so rephrasings like "coding club" / "coding clubs"
+    skip the vector database. Search is a brute-force dot product over at
+    most `capacity` normalized vectors.
+    """
+    
+    def __init__(self, capacity: int = 1024, threshold: float = 0.95):
+        self.capacity = capacity
+        self.threshold = threshold
+        self._vectors: Optional[np.ndarray] = None
+        self._values: List[Any] = []
+        self._last_used = np.zeros(capacity, dtype=np.int64)
+        self._clock = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32)
+        return embedding / max(float(np.linalg.norm(embedding)), 1e-12)
+    
+    def get(self, embedding: np.ndarray) -> Optional[Any]:
+        """Return the value stored for the most similar cached query, if close enough"""
+        query = self._normalize(embedding)
+        with self._lock:
+            size = len(self._values)
+            if size == 0:
+                return None
+            scores = self._vectors[:size] @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            self._clock += 1
+            self._last_used[best] = self._clock
+            return self._values[best]
+    
+    def put(self, embedding: np.ndarray, value: Any) -> None:
+        """Cache a value, evicting the least recently used entry when full"""
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.empty((self.capacity, vector.shape[0]), dtype=np.float32)
+            if len(self._values) < self.capacity:
+                slot = len(self._values)
+                self._values.append(value)
+            else:
+                slot = int(np.argmin(self._last_used))
+                self._values[slot] = value
+            self._vectors[slot] = vector
+            self._clock += 1
+            self._last_used[slot] = self._clock